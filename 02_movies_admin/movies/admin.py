@@ -5,16 +5,37 @@ from django.utils.translation import gettext_lazy as _
 from movies.models import Filmwork, Genre, GenreFilmwork, Person, PersonFilmwork
 
 
-class GenreFilmworkInline(admin.TabularInline):
+class FilmworkRelationInline(admin.TabularInline):
+    """Base inline class for relations of filmwork, related objects are fetched in the same query."""
+
+    related_field = ""
+
+    def get_queryset(self, request):
+        """Override default to select filmwork and related object with relations.
+
+        Args:
+            request: current request.
+
+        Returns:
+            relations queryset.
+        """
+        return super().get_queryset(request).select_related("film_work", self.related_field)
+
+
+class GenreFilmworkInline(FilmworkRelationInline):
     """Inline class for film genre changing."""
 
     model = GenreFilmwork
+    related_field = "genre"
+    autocomplete_fields = ("genre",)
 
 
-class PersonFilmworkInline(admin.TabularInline):
+class PersonFilmworkInline(FilmworkRelationInline):
     """Inline class for person film changing."""
 
     model = PersonFilmwork
+    related_field = "person"
+    autocomplete_fields = ("film_work",)
 
 
 @admin.register(Genre)
@@ -32,6 +53,7 @@ class FilmworkAdmin(admin.ModelAdmin):
     inlines = (GenreFilmworkInline, )
     list_display = ("title", "type", "creation_date", "rating", "film_genres", "film_directors", "film_writers")
     list_filter = ("type",)
+    # title and description are served by trigram indexes, id is matched as text with a sequential scan
     search_fields = ("title", "description", "id")
 
     @admin.display(description=_("FILM_GENRES"))
@@ -63,4 +85,5 @@ class PersonAdmin(admin.ModelAdmin):
 
     inlines = (PersonFilmworkInline, )
     list_display = ("full_name", )
+    # full_name is served by trigram index, id is matched as text with a sequential scan
     search_fields = ("full_name", "id")
@@ -91,18 +91,10 @@ class Migration(migrations.Migration):
             name='genres',
             field=models.ManyToManyField(through='movies.GenreFilmwork', to='movies.Genre'),
         ),
-        migrations.AddIndex(
-            model_name='personfilmwork',
-            index=models.Index(fields=['film_work', 'person', 'role'], name='film_work_person_role_idx'),
-        ),
         migrations.AddConstraint(
             model_name='personfilmwork',
             constraint=models.UniqueConstraint(fields=('film_work', 'person', 'role'), name='film_work_person_role_idx'),
         ),
-        migrations.AddIndex(
-            model_name='genrefilmwork',
-            index=models.Index(fields=['film_work', 'genre'], name='film_work_genre_idx'),
-        ),
         migrations.AddConstraint(
             model_name='genrefilmwork',
             constraint=models.UniqueConstraint(fields=('film_work', 'genre'), name='film_work_genre_idx'),
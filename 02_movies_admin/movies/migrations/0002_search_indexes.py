@@ -0,0 +1,34 @@
+# Generated by Django 3.2 on 2026-10-15 09:05
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0001_initial'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='filmwork',
+            name='persons',
+            field=models.ManyToManyField(through='movies.PersonFilmwork', to='movies.Person'),
+        ),
+        # indexes are created only if missing, database built by schema DDL already has them
+        # admin search uses icontains, which is UPPER(column) LIKE UPPER('%...%') on Postgres
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS film_work_title_trgm_idx ON content.film_work USING gin (UPPER(title) gin_trgm_ops);',
+            reverse_sql='DROP INDEX IF EXISTS content.film_work_title_trgm_idx;',
+        ),
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS film_work_description_trgm_idx ON content.film_work USING gin (UPPER(description) gin_trgm_ops);',
+            reverse_sql='DROP INDEX IF EXISTS content.film_work_description_trgm_idx;',
+        ),
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS person_full_name_trgm_idx ON content.person USING gin (UPPER(full_name) gin_trgm_ops);',
+            reverse_sql='DROP INDEX IF EXISTS content.person_full_name_trgm_idx;',
+        ),
+    ]
@@ -55,6 +55,14 @@ class Person(UUIDMixin, TimeStampedMixin):
         verbose_name = _("person")
         verbose_name_plural = _("persons")
 
+    def __str__(self) -> str:
+        """Override default.
+
+        Returns:
+            person full name.
+        """
+        return self.full_name
+
 
 class Filmwork(UUIDMixin, TimeStampedMixin):
     """Class model represents model for cinematographic work."""
@@ -88,20 +96,35 @@ class Filmwork(UUIDMixin, TimeStampedMixin):
         return self.title
 
 
-class GenreFilmwork(UUIDMixin):
-    """Class model represents relations many to many between genre and filmwork models."""
+class FilmworkRelation(UUIDMixin):
+    """Abstract model with fields shared by relations of filmwork with genres and persons."""
 
     film_work = models.ForeignKey("Filmwork", on_delete=models.CASCADE)
-    genre = models.ForeignKey("Genre", on_delete=models.CASCADE)
     created = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        abstract = True
+
+
+class GenreFilmwork(FilmworkRelation):
+    """Class model represents relations many to many between genre and filmwork models."""
+
+    genre = models.ForeignKey("Genre", on_delete=models.CASCADE)
+
     class Meta:
         db_table = "content\".\"genre_film_work"
         constraints = [models.UniqueConstraint(fields=["film_work", "genre"], name="film_work_genre_idx")]
-        indexes = [models.Index(fields=("film_work", "genre"), name="film_work_genre_idx")]
+
+    def __str__(self) -> str:
+        """Override default without fetching related objects.
+
+        Returns:
+            ids of related filmwork and genre.
+        """
+        return "{0} {1}".format(self.film_work_id, self.genre_id)
 
 
-class PersonFilmwork(UUIDMixin):
+class PersonFilmwork(FilmworkRelation):
     """Class model represents relations between person and filmwork models."""
 
     class Roles(models.TextChoices):
@@ -111,12 +134,17 @@ class PersonFilmwork(UUIDMixin):
         director = "director", _("director")
         writer = "writer", _("writer")
 
-    film_work = models.ForeignKey("Filmwork", on_delete=models.CASCADE)
     person = models.ForeignKey("Person", on_delete=models.CASCADE)
     role = models.TextField(_("role"), choices=Roles.choices, max_length=8, null=True)
-    created = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         db_table = "content\".\"person_film_work"
         constraints = [models.UniqueConstraint(fields=["film_work", "person", "role"], name="film_work_person_role_idx")]
-        indexes = [models.Index(fields=("film_work", "person", "role"), name="film_work_person_role_idx")]
+
+    def __str__(self) -> str:
+        """Override default without fetching related objects.
+
+        Returns:
+            ids of related filmwork and person with role.
+        """
+        return "{0} {1} {2}".format(self.film_work_id, self.person_id, self.role)
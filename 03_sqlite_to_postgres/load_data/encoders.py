@@ -0,0 +1,231 @@
+"""Encoders of sqlite rows values to Postgres binary COPY format."""
+import io
+import struct
+import uuid
+from dataclasses import fields
+from datetime import date, datetime
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Callable, Iterator, Optional, Type, Union, get_args, get_origin
+
+from tables import TableRow
+from validators import parse_datetime
+
+COPY_BINARY_HEADER = struct.pack('!11sii', b'PGCOPY\n\xff\r\n\x00', 0, 0)
+COPY_BINARY_TRAILER = struct.pack('!h', -1)
+NULL_FIELD = struct.pack('!i', -1)
+UUID_LENGTH = 16
+UUID_FIELD_LENGTH = struct.pack('!i', UUID_LENGTH)
+
+FIELD_COUNT = struct.Struct('!h')
+FIELD_LENGTH = struct.Struct('!i')
+INT4_FIELD = struct.Struct('!ii')
+INT8_FIELD = struct.Struct('!iq')
+FLOAT8_FIELD = struct.Struct('!id')
+
+PG_EPOCH = datetime.fromisoformat('2000-01-01T00:00:00+00:00')
+PG_EPOCH_DATE = PG_EPOCH.date()
+SECONDS_IN_DAY = 86400
+MICROSECONDS_IN_SECOND = 1000000
+NONE_TYPE = type(None)
+
+
+def encode_uuid(row_value: Optional[str]) -> bytes:
+    """Encode uuid string to binary uuid field.
+
+    Args:
+        row_value: uuid in string format
+
+    Returns:
+        bytes: field length and 16 bytes of uuid, NULL field for None
+
+    """
+    if row_value is None:
+        return NULL_FIELD
+    return UUID_FIELD_LENGTH + uuid.UUID(row_value).bytes
+
+
+def encode_text(row_value: Any) -> bytes:
+    """Encode value to binary text field.
+
+    Args:
+        row_value: value to encode
+
+    Returns:
+        bytes: field length and utf-8 encoded text, NULL field for None
+
+    """
+    if row_value is None:
+        return NULL_FIELD
+    encoded = str(row_value).encode('utf-8')
+    return FIELD_LENGTH.pack(len(encoded)) + encoded
+
+
+def encode_float(row_value: Union[int, float, None]) -> bytes:
+    """Encode number to binary float8 field.
+
+    Args:
+        row_value: number to encode
+
+    Returns:
+        bytes: field length and 8 bytes of double, NULL field for None
+
+    """
+    if row_value is None:
+        return NULL_FIELD
+    return FLOAT8_FIELD.pack(8, row_value)
+
+
+def encode_date(row_value: Union[date, str, None]) -> bytes:
+    """Encode date to binary date field, days since Postgres epoch.
+
+    Args:
+        row_value: date or date in iso format
+
+    Returns:
+        bytes: field length and 4 bytes of days, NULL field for None
+
+    """
+    if row_value is None:
+        return NULL_FIELD
+    if not isinstance(row_value, date):
+        row_value = date.fromisoformat(row_value)
+    return INT4_FIELD.pack(4, (row_value - PG_EPOCH_DATE).days)
+
+
+def encode_timestamp(row_value: Union[datetime, str, None]) -> bytes:
+    """Encode timezone aware datetime to binary timestamptz field, microseconds since Postgres epoch.
+
+    Args:
+        row_value: datetime or datetime in sqlite text format
+
+    Returns:
+        bytes: field length and 8 bytes of microseconds, NULL field for None
+
+    """
+    if row_value is None:
+        return NULL_FIELD
+    if not isinstance(row_value, datetime):
+        row_value = parse_datetime(row_value)
+    delta = row_value - PG_EPOCH
+    seconds = delta.days * SECONDS_IN_DAY + delta.seconds
+    return INT8_FIELD.pack(8, seconds * MICROSECONDS_IN_SECOND + delta.microseconds)
+
+
+ENCODERS_BY_TYPE = MappingProxyType({
+    uuid.UUID: encode_uuid,
+    str: encode_text,
+    float: encode_float,
+    date: encode_date,
+    datetime: encode_timestamp,
+})
+
+
+def get_column_type(field_type: Any) -> type:
+    """Get type of Postgres column for dataclass field type.
+
+    Optional and Union types are mapped to their last not None type, e.g. Union[int, float, None] to float.
+
+    Args:
+        field_type: type of dataclass field
+
+    Returns:
+        type: type of column values
+
+    """
+    if get_origin(field_type) is Union:
+        return [possible_type for possible_type in get_args(field_type) if possible_type is not NONE_TYPE][-1]
+    return field_type
+
+
+@lru_cache(maxsize=None)
+def get_encoders(dc: Type[TableRow]) -> tuple[Callable[[Any], bytes], ...]:
+    """Get encoders of dataclass fields, built once per dataclass.
+
+    Args:
+        dc: dataclass to get encoders for
+
+    Returns:
+        tuple: encoder per field in order of dataclass fields
+
+    """
+    return tuple(ENCODERS_BY_TYPE[get_column_type(field.type)] for field in fields(dc))
+
+
+class RowProducer(io.RawIOBase):
+    """Read-only file-like object which encodes rows to binary COPY format on demand.
+
+    Encoded rows are written over the same pending buffer on every refill and it is never truncated,
+    truncation would shrink the allocation and the buffer would be grown again by reallocations on every refill.
+    """
+
+    def __init__(self, rows: Iterator[tuple], encoders: tuple[Callable[[Any], bytes], ...]) -> None:
+        """Initialize row producer.
+
+        Args:
+            rows: iterator of rows values to encode
+            encoders: encoder per column of rows
+
+        """
+        super().__init__()
+        self._rows = rows
+        self._encoders = encoders
+        self._row_header = FIELD_COUNT.pack(len(encoders))
+        self._pending = io.BytesIO(COPY_BINARY_HEADER)
+        self._pending_size = len(COPY_BINARY_HEADER)
+        self._exhausted = False
+
+    def readable(self) -> bool:
+        """Mark object as readable for io machinery.
+
+        Returns:
+            bool: always True
+
+        """
+        return True
+
+    def readinto(self, buffer: memoryview) -> int:
+        """Fill buffer with encoded rows, rows are pulled from rows iterator when pending bytes are consumed.
+
+        Args:
+            buffer: buffer to fill
+
+        Returns:
+            int: number of bytes written to buffer, 0 if rows are exhausted
+
+        """
+        if self._pending.tell() == self._pending_size:
+            self._refill(len(buffer))
+        # bytes after pending size are left from previous refills and must not be read
+        return self._pending.readinto(memoryview(buffer)[:self._pending_size - self._pending.tell()])
+
+    def _refill(self, size: int) -> None:
+        """Write next rows over pending buffer, encode rows until at least size bytes are pending.
+
+        Args:
+            size: number of bytes to encode
+
+        """
+        self._pending.seek(0)
+        while not self._exhausted and self._pending.tell() < size:
+            row = next(self._rows, None)
+            if row is None:
+                self._pending.write(COPY_BINARY_TRAILER)
+                self._exhausted = True
+            else:
+                self._pending.write(self._encode_row(row))
+        self._pending_size = self._pending.tell()
+        self._pending.seek(0)
+
+    def _encode_row(self, row: tuple) -> bytes:
+        """Encode row to binary COPY tuple.
+
+        Args:
+            row: values of row
+
+        Returns:
+            bytes: fields count and encoded fields
+
+        """
+        encoded_fields = [encode(row_value) for encode, row_value in zip(self._encoders, row)]
+        return self._row_header + b''.join(encoded_fields)
@@ -1,19 +1,69 @@
 """Script to migrate data from sqlite3 to Postgres database."""
+import argparse
+import os
 import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import closing
+from itertools import repeat
+from pathlib import Path
 
 import psycopg2
 from dotenv import dotenv_values
-from loaders import PostgresSaver, SQLiteLoader
+from loaders import SKIPPED_ROWS_LOG, PostgresSaver, SQLiteLoader
 from psycopg2.extras import DictCursor
-from tables import table_registry
+from tables import migration_waves, table_registry
 
-if __name__ == '__main__':
-    config = dotenv_values(".env")
-    with sqlite3.connect('db.sqlite') as sqlite_conn:
-        with psycopg2.connect(**config, cursor_factory=DictCursor) as pg_conn:
+SQLITE_DB = 'db.sqlite'
+APPLICATION_NAME = 'sqlite_to_postgres_{0}'
+
+
+def migrate_table(table_name: str, dsl: dict[str, str], freeze: bool, drop_indexes: bool) -> None:
+    """Migrate one table from sqlite to Postgres with own connections to both databases.
+
+    Args:
+        table_name: name of table from table registry
+        dsl: Postgres connection parameters
+        freeze: truncate target table and copy rows with COPY FREEZE
+        drop_indexes: drop indexes of target table before COPY and create them after
+
+    """
+    with closing(sqlite3.connect(SQLITE_DB)) as sqlite_conn:
+        pg_conn = psycopg2.connect(
+            **dsl,
+            application_name=APPLICATION_NAME.format(table_name),
+            cursor_factory=DictCursor,
+        )
+        with closing(pg_conn):
 
-            postgres_saver = PostgresSaver(pg_conn)
+            postgres_saver = PostgresSaver(pg_conn, freeze, drop_indexes)
             sqlite_loader = SQLiteLoader(sqlite_conn)
 
-            sqlite_data = sqlite_loader.load_movies(table_registry)
+            sqlite_data = sqlite_loader.load_movies({table_name: table_registry[table_name]})
             postgres_saver.save_all_data(sqlite_data)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Migrate movies from sqlite to Postgres.')
+    parser.add_argument(
+        '--freeze',
+        action='store_true',
+        help=' '.join((
+            'truncate target tables and copy rows frozen, rows with duplicated ids fail the table load;',
+            'truncate cascades to link tables and locks them, so film_work, genre and person are loaded',
+            'one by one, and a failed load leaves link tables empty until migration is re-run',
+        )),
+    )
+    parser.add_argument(
+        '--drop-indexes',
+        action='store_true',
+        help='drop indexes of target tables before COPY and create them after it',
+    )
+    args = parser.parse_args()
+    config = dotenv_values(".env")
+    # workers append to log, so log of previous run is truncated once here
+    Path(SKIPPED_ROWS_LOG).write_text('', encoding='utf-8')
+
+    with ProcessPoolExecutor(max_workers=min(len(table_registry), os.cpu_count() or 1)) as executor:
+        for wave in migration_waves:
+            options = (repeat(config), repeat(args.freeze), repeat(args.drop_indexes))
+            list(executor.map(migrate_table, wave, *options))
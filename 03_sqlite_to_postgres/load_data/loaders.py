@@ -1,62 +1,30 @@
 """SQLite and Postgres loaders."""
-import csv
 import logging
 import sqlite3
-from dataclasses import fields
-from datetime import datetime
-from io import StringIO
-from typing import Any, Callable, Generator, Type, Union, get_args, get_origin
+from itertools import chain
+from typing import Generator, Iterator, Optional, Type
 
 import psycopg2
+from encoders import RowProducer, get_encoders
 from psycopg2.extensions import connection as _connection
-from tables import Filmwork, Genre, GenreFilmwork, Person, PersonFilmwork
+from psycopg2.extensions import cursor as _cursor
+from tables import Table, TableRow, column_names, datetime_columns
+from validators import convert_to_datetime, get_validators
+
+SKIPPED_ROWS_LOG = 'skipped_rows.log'
+COPY_READ_SIZE = 262144
 
 file_logger = logging.getLogger('file_logger')
 file_logger.setLevel(logging.INFO)
-log = logging.FileHandler('skipped_rows.log', 'w', 'utf-8')
+log = logging.FileHandler(SKIPPED_ROWS_LOG, 'a', 'utf-8', delay=True)
 log.setLevel(logging.INFO)
 file_logger.addHandler(log)
 
-UniqueViolation = psycopg2.errors.lookup('23505')
-
-
-def check_value_error(func: Callable[[Any], Any], arg: Any) -> bool:
-    """Check if func call trigger ValueError. Used for types convertions.
-
-    Args:
-        func: function to test
-        arg: function argument for testing
-
-    Returns:
-        bool: True if ValueError rised
-
-    """
-    try:
-        func(arg)
-    except ValueError:
-        return True
-    return False
-
-
-def convert_to_datetime(datetime_value: str) -> Union[datetime, str]:
-    """Convert datetime in string format to python datatime class or return value itself in case of ValueError.
-
-    Args:
-        datetime_value: datetime in string format
-
-    Returns:
-        ether a datetime object converted from string date or string itself in case of ValueError
-
-    """
-    try:
-        converted = datetime.strptime('{0}00'.format(datetime_value), '%Y-%m-%d %H:%M:%S.%f%z')
-    except ValueError:
-        return datetime_value
-    return converted
+TableRows = tuple[str, Type[TableRow], Iterator[tuple]]
 
 
 class SQLiteLoader:
-    """Loader of data from sqlite3 to csv tables."""
+    """Loader of data from sqlite3 to stream of validated rows."""
 
     def __init__(self, connection: sqlite3.Connection) -> None:
         """Initialize of loader.
@@ -67,130 +35,246 @@ class SQLiteLoader:
         """
         self._connection = connection
         self._dataclass = None
+        self._validators = ()
+        self._datetime_columns = ()
         self._table_name = ''
-        self._uniq_ids = set()
-        self._output = StringIO()
+        self._sql_pragmas = (
+            'pragma query_only = on',
+            'pragma temp_store = memory',
+            'pragma mmap_size = 30000000000',
+            'pragma cache_size = -262144',
+        )
+        self._configure_connection()
+
+    def load_movies(self, table_registry: dict['str', Table]) -> Generator[TableRows, None, None]:
+        """Select data from sqlite3 table by table.
 
-    def load_movies(
-        self,
-        table_registry: dict['str', Type[Union[Filmwork, Genre, Person, GenreFilmwork, PersonFilmwork]]],
-        n_rows: int = 1000,
-    ) -> Generator[tuple[str, StringIO], None, None]:
-        """Select data from sqlite3 and save to files.
+        Rows iterator of a table must be exhausted before next table is requested.
+        Rows are fetched by batches of cursor arraysize and flow through C-level iterators,
+        the only Python call per row is the validation, which also parses datetimes once for encoding.
 
         Args:
             table_registry: dict of tables to load.
-            n_rows: number of rows to fetch from sqlite at once. Default = 1000.
 
         Yields:
-            tuple: table name and file-like object
+            tuple: table name, table dataclass and iterator of validated rows
 
         """
-        for table_name, dc in table_registry.items():
-            self._uniq_ids = set()
-            self._dataclass = dc
+        for table_name, table in table_registry.items():
+            self._set_dataclass(table.data_class)
             self._table_name = table_name
             cur = self._connection.cursor()
-            cur.execute(self._sql_from_dataclass(dc))
-            while True:
-                rows = cur.fetchmany(size=n_rows)
-                if not rows:
-                    break
-                dc_rows = [self._dataclass(*row) for row in rows]
-                self._save_to_csv(dc_rows)
-                yield (self._table_name, self._output)
+            cur.arraysize = table.n_rows
+            cur.execute(self._sql_from_dataclass(table.data_class))
+            rows = chain.from_iterable(iter(cur.fetchmany, []))
+            yield (self._table_name, self._dataclass, filter(None, map(self._validated_row, rows)))
             cur.close()
 
-    def _sql_from_dataclass(self, dc: Type[Union[Filmwork, Genre, Person, GenreFilmwork, PersonFilmwork]]) -> str:
-        select_fields = [field.name for field in fields(dc)]
-        return "select {columns} from {table}".format(columns=','.join(select_fields), table=self._table_name)
+    def _configure_connection(self) -> None:
+        """Tune connection for reading only, database file is memory mapped and rows are plain tuples."""
+        self._connection.row_factory = None
+        for pragma in self._sql_pragmas:
+            self._connection.execute(pragma)
 
-    def _save_to_csv(self, dc_rows: list) -> None:
-        """Save list of dataclasses instances to csv in memory writer.
+    def _set_dataclass(self, dc: Type[TableRow]) -> None:
+        """Set dataclass of current table, its fields validators and positions of datetime fields.
 
         Args:
-            dc_rows: dataclasses list of rows to save to csv
+            dc: dataclass of table to load
 
         """
-        output = StringIO()
-        csv_writer = csv.writer(output, delimiter='\t', escapechar='\\', quoting=csv.QUOTE_NONE)
-        for row in dc_rows:
-            row_values = [getattr(row, field.name) for field in fields(self._dataclass)]
-            if self._validate_uniqs(row) and self._validate_types(row):
-                csv_writer.writerow(row_values)
-            else:
-                file_logger.info(
-                    'validation error\ttable:{0}\trow:{1}'.format(self._table_name, ','.join(map(str, row_values))),
-                )
-        output.seek(0)
-        self._output = output
-
-    def _validate_uniqs(self, dc: Union[Filmwork, Genre, Person, GenreFilmwork, PersonFilmwork]) -> bool:
-        """Validate id fields for unique values.
+        self._dataclass = dc
+        self._validators = get_validators(dc)
+        self._datetime_columns = datetime_columns(dc)
+
+    def _sql_from_dataclass(self, dc: Type[TableRow]) -> str:
+        return "select {columns} from {table}".format(columns=','.join(column_names(dc)), table=self._table_name)
+
+    def _validated_row(self, row: tuple) -> Optional[tuple]:
+        """Parse datetimes of row, validate it and log it if it is invalid.
+
+        Rows are selected in order of dataclass fields, so sqlite tuples are validated as is,
+        dataclass instance is created only to log invalid row.
+        Datetimes are parsed here once and encoders get datetime objects.
 
         Args:
-            dc: dataclass to validate
+            row: values of row in order of dataclass fields
 
         Returns:
-            bool: True if no dublicates of ids found, False if found
+            tuple: row with parsed datetimes or None if row is invalid
 
         """
-        if dc.id in self._uniq_ids:
-            return False
-        self._uniq_ids.add(dc.id)
-        return True
-
-    def _validate_types(self, dc: Union[Filmwork, Genre, Person, GenreFilmwork, PersonFilmwork]) -> bool:
+        converted = list(row)
+        for index in self._datetime_columns:
+            converted[index] = convert_to_datetime(converted[index])
+        if self._validate_types(converted):
+            return tuple(converted)
+        file_logger.info('validation error\ttable:{0}\trow:{1}'.format(self._table_name, self._dataclass(*row)))
+        return None
+
+    def _validate_types(self, row_values: list) -> bool:
         """Validate sqlite rows values have required data type of Postgres tables columns.
 
         Args:
-            dc: dataclass to check types
+            row_values: values of row in order of dataclass fields
 
         Returns:
             bool: True if no type mismatches found, False if at least one mismatches
 
         """
-        for field in fields(self._dataclass):
-            row_value = getattr(dc, field.name)
-            value_target_type = field.type
-            if get_origin(value_target_type) is Union:
-                optional_possible_types = get_args(value_target_type)
-                if datetime in optional_possible_types:
-                    row_value = convert_to_datetime(row_value)
-                if not isinstance(row_value, optional_possible_types):
-                    return False
-            elif check_value_error(value_target_type, row_value):
-                return False
-        return True
+        return all(validator(row_value) for validator, row_value in zip(self._validators, row_values))
 
 
 class PostgresSaver:
-    """Class to insert data from csv files to Postgres tables."""
+    """Class to stream rows to Postgres tables with COPY.
+
+    Rows are copied to temporary staging table first and then inserted to target table skipping duplicates,
+    so duplicated ids in sqlite and repeated runs of migration do not create duplicates in Postgres.
+
+    Rows are encoded on demand while COPY reads the producer, so no table is buffered in memory,
+    reads are big enough to keep number of Python calls and libpq messages per table low.
+
+    In freeze mode target table is truncated and rows are copied to it directly with COPY FREEZE,
+    so rows are written already frozen and are not rewritten by the first vacuum.
+    Rows are not deduplicated in this mode, duplicated id fails load of the table.
+    Truncate cascades to link tables and holds access exclusive locks on them until the table is committed,
+    so tables of the first wave wait for each other and are loaded one by one instead of concurrently.
+    If one table of the first wave fails after another one is committed, link tables are already emptied
+    by the cascade and stay empty, since the next wave is not run; migration has to be re-run.
 
-    def __init__(self, pg_conn: _connection) -> None:
+    With drop indexes, non-unique indexes which do not back constraints are dropped before COPY
+    and created again after it in the same transaction, so failed load rolls back to the original indexes.
+
+    Session runs with synchronous_commit off, so tables committed right before a server crash may be lost.
+    Migration has to be re-run in that case.
+    """
+
+    def __init__(self, pg_conn: _connection, freeze: bool = False, drop_indexes: bool = False) -> None:
         """Initialize postgres saver.
 
         Args:
             pg_conn: Postgres connection string
+            freeze: truncate target tables and copy rows with COPY FREEZE
+            drop_indexes: drop indexes of target tables before COPY and create them after
 
         """
         self._pg_conn = pg_conn
+        self._freeze = freeze
+        self._rebuild_indexes = drop_indexes
+        self._sql_session_settings = '; '.join((
+            'set synchronous_commit = off',
+            "set maintenance_work_mem = '512MB'",
+            "set temp_buffers = '256MB'",
+            'set max_parallel_maintenance_workers = 4',
+            'set statement_timeout = 0',
+            'set client_min_messages = warning',
+        ))
+        self._sql_create_staging = 'create temp table {staging} (like {table} including defaults) on commit drop'
+        self._sql_copy = 'copy {0} from stdin with (format binary)'
+        self._sql_truncate = 'truncate {0} cascade'
+        self._sql_copy_freeze = 'copy {0} from stdin with (format binary, freeze)'
+        self._sql_insert_from_staging = (
+            'insert into {table} select distinct on (id) * from {staging} order by id on conflict do nothing'
+        )
+        self._sql_select_indexes = ' '.join((
+            'select i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid) from pg_index i',
+            'left join pg_constraint c on c.conindid = i.indexrelid',
+            'where i.indrelid = %(table)s::regclass and not i.indisunique and c.oid is null',
+        ))
+        self._sql_drop_index = 'drop index {0}'
+        self._sql_analyze = 'analyze {0}'
+        # session is tuned for bulk load, migration is durable after commit of each table anyway
+        with self._pg_conn.cursor() as cursor:
+            cursor.execute(self._sql_session_settings)
+        self._pg_conn.commit()
 
-    def save_all_data(self, sqlite_output: Generator[tuple[str, StringIO], None, None]) -> None:
-        """Insert data from csv file to Postgres tables.
+    def save_all_data(self, sqlite_output: Generator[TableRows, None, None]) -> None:
+        """Insert rows to Postgres tables.
 
         Args:
-            sqlite_output: generator of names of csv file to import to Postgres
+            sqlite_output: generator of table names, table dataclasses and rows to import to Postgres
 
         """
-        for table, fl in sqlite_output:
-            self._insert_in_pg(table, fl)
-
-    def _insert_in_pg(self, table: str, fl: StringIO) -> None:
         with self._pg_conn.cursor() as cursor:
-            try:
-                cursor.copy_from(fl, table, sep='\t', null="")
-            except UniqueViolation:
-                self._pg_conn.rollback()
-            else:
-                self._pg_conn.commit()
+            for table, dc, rows in sqlite_output:
+                self._insert_in_pg(cursor, table, RowProducer(rows, get_encoders(dc)))
+
+    def _insert_in_pg(self, cursor: _cursor, table: str, producer: RowProducer) -> None:
+        """Load table in one transaction which is committed once at the end of table.
+
+        Args:
+            cursor: Postgres cursor
+            table: name of target table
+            producer: file-like object with rows in COPY format
+
+        Raises:
+            psycopg2.Error: if table load failed, transaction is rolled back
+
+        """
+        try:
+            self._load_table(cursor, table, producer)
+        except psycopg2.Error:
+            self._pg_conn.rollback()
+            raise
+        self._pg_conn.commit()
+
+    def _load_table(self, cursor: _cursor, table: str, producer: RowProducer) -> None:
+        """Copy rows to target table, rebuild its indexes if requested and analyze it.
+
+        Statements after COPY are sent in one round trip.
+
+        Args:
+            cursor: Postgres cursor
+            table: name of target table
+            producer: file-like object with rows in COPY format
+
+        """
+        index_definitions = self._drop_indexes(cursor, table) if self._rebuild_indexes else []
+        copy_table = self._copy_frozen if self._freeze else self._copy_through_staging
+        copy_table(cursor, table, producer)
+        cursor.execute('; '.join((*index_definitions, self._sql_analyze.format(table))))
+
+    def _drop_indexes(self, cursor: _cursor, table: str) -> list[str]:
+        """Drop non-unique indexes of table which do not back constraints with one statement.
+
+        Unique indexes are kept, they are arbiters of on conflict when rows are inserted from staging table.
+
+        Args:
+            cursor: Postgres cursor
+            table: name of target table
+
+        Returns:
+            list: definitions of dropped indexes to create them again
+
+        """
+        cursor.execute(self._sql_select_indexes, {'table': table})
+        indexes = cursor.fetchall()
+        if indexes:
+            cursor.execute(self._sql_drop_index.format(', '.join(index_name for index_name, _ in indexes)))
+        return [index_definition for _, index_definition in indexes]
+
+    def _copy_through_staging(self, cursor: _cursor, table: str, producer: RowProducer) -> None:
+        """Copy rows to staging table and insert them to target table skipping duplicates.
+
+        Args:
+            cursor: Postgres cursor
+            table: name of target table
+            producer: file-like object with rows in COPY format
+
+        """
+        staging = 'staging_{0}'.format(table)
+        cursor.execute(self._sql_create_staging.format(staging=staging, table=table))
+        cursor.copy_expert(self._sql_copy.format(staging), producer, size=COPY_READ_SIZE)
+        cursor.execute(self._sql_insert_from_staging.format(staging=staging, table=table))
+
+    def _copy_frozen(self, cursor: _cursor, table: str, producer: RowProducer) -> None:
+        """Truncate target table and copy rows to it frozen in the same transaction.
+
+        Args:
+            cursor: Postgres cursor
+            table: name of target table
+            producer: file-like object with rows in COPY format
+
+        """
+        cursor.execute(self._sql_truncate.format(table))
+        cursor.copy_expert(self._sql_copy_freeze.format(table), producer, size=COPY_READ_SIZE)
@@ -1,11 +1,15 @@
 """File describes sqlite tables structure which needs to be migrated from sqlite to Postgres."""
 import uuid
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from datetime import date, datetime
-from typing import Optional, Union
+from functools import lru_cache
+from typing import NamedTuple, Optional, Type, Union, get_args
 
+COPY_BATCH_VALUES = 250000
+MIN_BATCH_ROWS = 10000
 
-@dataclass(frozen=True)
+
+@dataclass(slots=True)
 class Filmwork:
     """Target table definition in Postgres for film_work."""
 
@@ -19,7 +23,7 @@ class Filmwork:
     updated_at: Optional[datetime]
 
 
-@dataclass(frozen=True)
+@dataclass(slots=True)
 class Genre:
     """Target table definition in Postgres for genre."""
 
@@ -30,7 +34,7 @@ class Genre:
     updated_at: Optional[datetime]
 
 
-@dataclass(frozen=True)
+@dataclass(slots=True)
 class Person:
     """Target table definition in Postgres for person."""
 
@@ -40,7 +44,7 @@ class Person:
     updated_at: Optional[datetime]
 
 
-@dataclass(frozen=True)
+@dataclass(slots=True)
 class GenreFilmwork:
     """Target table definition in Postgres for genre_film_work."""
 
@@ -50,7 +54,7 @@ class GenreFilmwork:
     created_at: Optional[datetime]
 
 
-@dataclass(frozen=True)
+@dataclass(slots=True)
 class PersonFilmwork:
     """Target table definition in Postgres for person_film_work."""
 
@@ -61,9 +65,67 @@ class PersonFilmwork:
     created_at: Optional[datetime]
 
 
+TableRow = Union[Filmwork, Genre, Person, GenreFilmwork, PersonFilmwork]
+
+
+class Table(NamedTuple):
+    """Table to migrate with its dataclass definition and number of rows to fetch at once."""
+
+    data_class: Type[TableRow]
+    n_rows: int
+
+
+@lru_cache(maxsize=None)
+def column_names(dc: Type[TableRow]) -> tuple[str, ...]:
+    """Get names of table columns, dataclass fields are walked once per dataclass.
+
+    Args:
+        dc: dataclass of table
+
+    Returns:
+        tuple: names of columns in order of dataclass fields
+
+    """
+    return tuple(field.name for field in fields(dc))
+
+
+@lru_cache(maxsize=None)
+def datetime_columns(dc: Type[TableRow]) -> tuple[int, ...]:
+    """Get positions of datetime columns, dataclass fields types are inspected once per dataclass.
+
+    Args:
+        dc: dataclass of table
+
+    Returns:
+        tuple: indexes of datetime fields
+
+    """
+    fields_types = [field.type for field in fields(dc)]
+    return tuple(index for index, field_type in enumerate(fields_types) if datetime in get_args(field_type))
+
+
+def batch_size(dc: Type[TableRow]) -> int:
+    """Calculate number of rows per batch so narrow tables are fetched in bigger batches.
+
+    Args:
+        dc: dataclass of table
+
+    Returns:
+        int: number of rows to fetch at once
+
+    """
+    return max(MIN_BATCH_ROWS, COPY_BATCH_VALUES // len(column_names(dc)))
+
+
 table_registry = {}
-table_registry['film_work'] = Filmwork
-table_registry['genre'] = Genre
-table_registry['person'] = Person
-table_registry['genre_film_work'] = GenreFilmwork
-table_registry['person_film_work'] = PersonFilmwork
+table_registry['film_work'] = Table(Filmwork, batch_size(Filmwork))
+table_registry['genre'] = Table(Genre, batch_size(Genre))
+table_registry['person'] = Table(Person, batch_size(Person))
+table_registry['genre_film_work'] = Table(GenreFilmwork, batch_size(GenreFilmwork))
+table_registry['person_film_work'] = Table(PersonFilmwork, batch_size(PersonFilmwork))
+
+# tables in one wave do not depend on each other and can be migrated concurrently
+migration_waves = (
+    ('film_work', 'genre', 'person'),
+    ('genre_film_work', 'person_film_work'),
+)
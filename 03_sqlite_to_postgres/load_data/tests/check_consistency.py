@@ -3,9 +3,11 @@ import logging
 import os
 import sqlite3
 import sys
-from dataclasses import dataclass, fields
-from datetime import datetime
-from typing import Generator, Optional, Type, Union
+import uuid
+from contextlib import closing
+from dataclasses import dataclass
+from itertools import chain
+from typing import Generator, Iterator, Optional, Union
 
 import psycopg2
 from dotenv import dotenv_values
@@ -16,14 +18,8 @@ from psycopg2.extras import DictCursor
 current = os.path.dirname(os.path.realpath(__file__))
 parent = os.path.dirname(current)
 sys.path.append(parent)
-from tables import (
-    Filmwork,
-    Genre,
-    GenreFilmwork,
-    Person,
-    PersonFilmwork,
-    table_registry,
-)
+from tables import Table, column_names, datetime_columns, table_registry
+from validators import convert_to_datetime
 
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 
@@ -59,31 +55,37 @@ def select_from_db(
     connection: Union[sqlite3.Connection, _connection],
     sql: str,
     sql_params: Optional[dict[str, tuple]] = None,
-    n_rows: int = 100,
+    n_rows: int = 10000,
 ) -> Generator[list, None, None]:
     """Retrive data from sqlite or postgress db.
 
+    Postgress rows are fetched with server-side cursor, so result is not materialized in client at once.
+    Cursor is closed when rows are exhausted or generator is discarded.
+
     Args:
         connection: connection string to database.
         sql: sql to execute in database
         sql_params: paramters for sql (default=None)
-        n_rows: number of rows to fetch at one iteration (default=100)
+        n_rows: number of rows to fetch at one iteration (default=10000)
 
     Yields:
         list: fetched rows.
 
     """
-    cur = connection.cursor()
-    if sql_params:
-        cur.execute(sql, sql_params)
+    if isinstance(connection, sqlite3.Connection):
+        cur = connection.cursor()
     else:
-        cur.execute(sql)
-    while True:
-        sql_result = cur.fetchmany(n_rows)
-        if not sql_result:
-            cur.close()
-            break
-        yield sql_result
+        cur = connection.cursor(name='consistency_{0}'.format(uuid.uuid4().hex))
+    with closing(cur):
+        if sql_params:
+            cur.execute(sql, sql_params)
+        else:
+            cur.execute(sql)
+        while True:
+            sql_result = cur.fetchmany(n_rows)
+            if not sql_result:
+                break
+            yield sql_result
 
 
 class TablesChecker:
@@ -99,30 +101,31 @@ class TablesChecker:
         """
         self._sqlite_conn = sqlite_conn
         self._pg_conn = pg_conn
-        self._pg_rows = []
         self._table = ''
+        self._datetime_columns = ()
         self._sql_rows_count = 'select count(*) from {0}'
-        self._sql_sqlite = 'select {0} from {1}'
+        self._sql_sqlite = 'select {0} from {1} order by id'
+        self._sql_pg = pg_sql.SQL('select * from {0} order by id')
         self.rows_stats = {}
 
-    def calculate_tables_stats(
-        self,
-        tables: dict['str', Type[Union[Filmwork, Genre, Person, GenreFilmwork, PersonFilmwork]]],
-    ) -> None:
+    def calculate_tables_stats(self, tables: dict['str', Table]) -> None:
         """Calculate rows counts and matches in SQLite and Postgress tables.
 
+        Both tables are read once ordered by id and matched in one merge pass.
+
         Args:
             tables: dict with table names to check and tables definitions
 
         """
-        for table, dc in tables.items():
+        for table, table_definition in tables.items():
             self._table = table
+            self._datetime_columns = datetime_columns(table_definition.data_class)
             self._count_rows_in_table()
 
-            columns = [field.name for field in fields(dc)]
-            for sqlite_row in select_from_db(self._sqlite_conn, self._sql_sqlite.format(','.join(columns), table)):
-                self._get_rows_from_pg_by_ids(sqlite_row)
-                self._compare_rows(sqlite_row)
+            columns = ','.join(column_names(table_definition.data_class))
+            sqlite_rows = select_from_db(self._sqlite_conn, self._sql_sqlite.format(columns, table))
+            pg_rows = select_from_db(self._pg_conn, self._sql_pg.format(pg_sql.Identifier(table)))
+            self._merge_rows(chain.from_iterable(sqlite_rows), chain.from_iterable(pg_rows))
 
     def _count_rows_in_table(self) -> None:
         """Count total rows per table."""
@@ -130,47 +133,37 @@ class TablesChecker:
         pg_rows = get_row_count(self._pg_conn, self._sql_rows_count.format(self._table))
         self.rows_stats[self._table] = TableRowsStats(sqlite_rows, pg_rows, 0)
 
-    def _get_rows_from_pg_by_ids(self, sqlite_rows: list) -> None:
-        """Get number rows from Postgress table with in filter.
-
-        Args:
-            sqlite_rows: sqlite rows with ids to select from postgress
-
-        """
-        sql = pg_sql.SQL('select * from {0} where id in %(ids)s').format(pg_sql.Identifier(self._table))
-        ids = tuple(row[0] for row in sqlite_rows)
-        try:
-            pg_rows = next(select_from_db(self._pg_conn, sql, {'ids': ids}))
-        except StopIteration:
-            pg_rows = []
-        self._pg_rows = pg_rows
+    def _merge_rows(self, sqlite_rows: Iterator[tuple], pg_rows: Iterator[list]) -> None:
+        """Count sqlite rows equal to postgress row with the same id, both rows streams are ordered by id.
 
-    def _compare_rows(self, sqlite_rows: list) -> None:
-        """Compare sqlite and postgress rows.
+        Postgress stream is advanced only past ids lower than current sqlite id,
+        so every sqlite row with duplicated id is compared with the same postgress row.
 
         Args:
-            sqlite_rows: list of rows from sqlite table
+            sqlite_rows: rows of sqlite table ordered by id
+            pg_rows: rows of postgress table ordered by id
         """
-        for sqlite_row in sqlite_rows:
-            for pg_row in self._pg_rows:
-                if sqlite_row == self._convert(pg_row):
-                    self.rows_stats[self._table].matched += 1
-                    break
+        pg_row = next(pg_rows, None)
+        for sqlite_row in map(self._convert, sqlite_rows):
+            while pg_row is not None and pg_row[0] < sqlite_row[0]:
+                pg_row = next(pg_rows, None)
+            if pg_row is not None and sqlite_row == tuple(pg_row):
+                self.rows_stats[self._table].matched += 1
 
-    def _convert(self, row: list) -> tuple:
-        """Convert dataime column in row to string.
+    def _convert(self, row: tuple) -> tuple:
+        """Convert datetime columns of sqlite row from string to datetime, so rows are compared natively.
 
         Args:
-            row: row of table.
+            row: row of sqlite table.
 
         Returns:
-            tuple: tuple copy of row with dataime converted to string.
+            tuple: copy of row with datetimes parsed.
 
         """
-        for index, column in enumerate(row):
-            if isinstance(column, datetime):
-                row[index] = '{0}+00'.format(datetime.strftime(column, '%Y-%m-%d %H:%M:%S.%f').rstrip('0'))
-        return tuple(row)
+        converted = list(row)
+        for index in self._datetime_columns:
+            converted[index] = convert_to_datetime(converted[index])
+        return tuple(converted)
 
 
 if __name__ == '__main__':
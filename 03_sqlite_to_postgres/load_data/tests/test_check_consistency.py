@@ -0,0 +1,63 @@
+"""Tests of ordered merge of sqlite and Postgres rows in consistency check."""
+from datetime import datetime
+
+from check_consistency import TableRowsStats, TablesChecker
+from tables import Person, datetime_columns
+
+CREATED_AT = '2021-06-16 20:14:09.221838+00'
+PG_CREATED_AT = datetime.fromisoformat('2021-06-16T20:14:09.221838+00:00')
+MATCHED_ID = '1a5ba1e4-0bd4-4dd5-bf9c-a2e5a6c9fa2c'
+DUPLICATED_ID = '2b3c0d1e-7a83-4f5e-9f19-9b1a7d0a4c55'
+PG_ONLY_ID = '3c8f2b6a-5d4e-4a1f-8e2c-6f7b9a0d1e2f'
+SQLITE_ONLY_ID = '4d1e3f5a-2b6c-4d7e-9f0a-1b2c3d4e5f6a'
+MISMATCHED_ID = '5e2f4a6b-3c7d-4e8f-a01b-2c3d4e5f6a7b'
+MATCHED_NAME = 'Mark Hamill'
+
+
+def merge(sqlite_rows: list[tuple], pg_rows: list[list]) -> TableRowsStats:
+    """Merge person rows with fresh checker.
+
+    Args:
+        sqlite_rows: sqlite rows ordered by id
+        pg_rows: Postgres rows ordered by id
+
+    Returns:
+        TableRowsStats: stats of person table
+
+    """
+    checker = TablesChecker(None, None)
+    checker._table = 'person'
+    checker._datetime_columns = datetime_columns(Person)
+    checker.rows_stats['person'] = TableRowsStats()
+    checker._merge_rows(iter(sqlite_rows), iter(pg_rows))
+    return checker.rows_stats['person']
+
+
+def test_merge_counts_only_equal_rows():
+    """Missing, extra and mismatched ids are not matched, every duplicated sqlite row is matched."""
+    sqlite_rows = [
+        (MATCHED_ID, MATCHED_NAME, CREATED_AT, CREATED_AT),
+        (DUPLICATED_ID, 'Harrison Ford', CREATED_AT, CREATED_AT),
+        (DUPLICATED_ID, 'Harrison Ford', CREATED_AT, CREATED_AT),
+        (SQLITE_ONLY_ID, 'Carrie Fisher', CREATED_AT, CREATED_AT),
+        (MISMATCHED_ID, 'George Lucas', CREATED_AT, CREATED_AT),
+    ]
+    pg_rows = [
+        [MATCHED_ID, MATCHED_NAME, PG_CREATED_AT, PG_CREATED_AT],
+        [DUPLICATED_ID, 'Harrison Ford', PG_CREATED_AT, PG_CREATED_AT],
+        [PG_ONLY_ID, 'Peter Mayhew', PG_CREATED_AT, PG_CREATED_AT],
+        [MISMATCHED_ID, 'G. Lucas', PG_CREATED_AT, PG_CREATED_AT],
+    ]
+
+    assert merge(sqlite_rows, pg_rows).matched == 3
+
+
+def test_merge_stops_when_postgres_rows_end():
+    """Sqlite rows after last Postgres row are not matched."""
+    sqlite_rows = [
+        (MATCHED_ID, MATCHED_NAME, CREATED_AT, None),
+        (SQLITE_ONLY_ID, 'Carrie Fisher', CREATED_AT, None),
+    ]
+    pg_rows = [[MATCHED_ID, MATCHED_NAME, PG_CREATED_AT, None]]
+
+    assert merge(sqlite_rows, pg_rows).matched == 1
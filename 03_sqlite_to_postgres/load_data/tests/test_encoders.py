@@ -0,0 +1,178 @@
+"""Tests of binary COPY encoding and sqlite datetime parsing."""
+import os
+import struct
+import sys
+import uuid
+from datetime import date, datetime, timedelta
+
+import pytest
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+from encoders import COPY_BINARY_HEADER, RowProducer, get_encoders
+from tables import Filmwork, PersonFilmwork
+from validators import parse_datetime
+
+PG_EPOCH = datetime.fromisoformat('2000-01-01T00:00:00+00:00')
+READ_SIZE = 8192
+ROLES_REPEAT = 50
+FILMWORK_ROW = (
+    '3d825f60-9fff-4dfe-b294-1a45fa1e115d',
+    'Star Wars: Эпизод IV',
+    None,
+    date.fromisoformat('1977-05-25'),
+    8.6,
+    'movie',
+    datetime.fromisoformat('2021-06-16T20:14:09.221838+00:00'),
+    '2021-06-16 20:14:09.2218+03',
+)
+UPDATED_AT = datetime.fromisoformat('2021-06-16T17:14:09.221800+00:00')
+
+
+def read_all(producer: RowProducer, size: int) -> bytes:
+    """Read producer to the end with reads of given size.
+
+    Args:
+        producer: producer to read
+        size: size of every read
+
+    Returns:
+        bytes: whole stream
+
+    """
+    chunks = []
+    chunk = producer.read(size)
+    while chunk:
+        chunks.append(chunk)
+        chunk = producer.read(size)
+    return b''.join(chunks)
+
+
+def decode_copy(copy_data: bytes) -> list[list]:
+    """Decode binary COPY stream to rows of raw fields, None for NULL fields.
+
+    Args:
+        copy_data: whole binary COPY stream
+
+    Returns:
+        list: rows of fields bytes
+
+    """
+    assert copy_data.startswith(COPY_BINARY_HEADER)
+    offset = len(COPY_BINARY_HEADER)
+    rows = []
+    fields_count = struct.unpack_from('!h', copy_data, offset)[0]
+    while fields_count != -1:
+        offset += 2
+        row = []
+        for _ in range(fields_count):
+            field_length = struct.unpack_from('!i', copy_data, offset)[0]
+            offset += 4
+            if field_length == -1:
+                row.append(None)
+                continue
+            row.append(copy_data[offset:offset + field_length])
+            offset += field_length
+        rows.append(row)
+        fields_count = struct.unpack_from('!h', copy_data, offset)[0]
+    assert offset + 2 == len(copy_data)
+    return rows
+
+
+def encode_rows(rows: list[tuple], encoders: tuple) -> list[list]:
+    """Encode rows with row producer and decode them back.
+
+    Args:
+        rows: rows to encode
+        encoders: encoder per column of rows
+
+    Returns:
+        list: rows of fields bytes
+
+    """
+    return decode_copy(read_all(RowProducer(iter(rows), encoders), READ_SIZE))
+
+
+@pytest.mark.parametrize('column, decode', [
+    (0, lambda field: str(uuid.UUID(bytes=field))),
+    (1, lambda field: field.decode('utf-8')),
+    (2, lambda field: field),
+    (3, lambda field: PG_EPOCH.date() + timedelta(days=struct.unpack('!i', field)[0])),
+    (4, lambda field: struct.unpack('!d', field)[0]),
+    (5, lambda field: field.decode('utf-8')),
+    (6, lambda field: PG_EPOCH + timedelta(microseconds=struct.unpack('!q', field)[0])),
+])
+def test_filmwork_fields_are_encoded(column, decode):
+    """Every column type of filmwork is decoded back to the source value."""
+    row = encode_rows([FILMWORK_ROW], get_encoders(Filmwork))[0]
+
+    assert decode(row[column]) == FILMWORK_ROW[column]
+
+
+def test_sqlite_timestamp_is_encoded():
+    """Timestamp in sqlite text format is encoded with its utc offset."""
+    updated_at = encode_rows([FILMWORK_ROW], get_encoders(Filmwork))[0][7]
+
+    assert PG_EPOCH + timedelta(microseconds=struct.unpack('!q', updated_at)[0]) == UPDATED_AT
+
+
+def test_date_before_epoch_is_negative():
+    """Dates before Postgres epoch are encoded as negative number of days."""
+    row = FILMWORK_ROW[:3] + ('1999-12-31',) + FILMWORK_ROW[4:]
+    creation_date = encode_rows([row], get_encoders(Filmwork))[0][3]
+
+    assert struct.unpack('!i', creation_date) == (-1,)
+
+
+def test_no_rows_is_header_and_trailer():
+    """Empty table is encoded as header and trailer only."""
+    copy_data = read_all(RowProducer(iter([]), get_encoders(PersonFilmwork)), READ_SIZE)
+
+    assert copy_data == COPY_BINARY_HEADER + struct.pack('!h', -1)
+
+
+@pytest.mark.parametrize('read_size', [1, 7, 100, 8192, 262144])
+def test_stream_does_not_depend_on_read_size(read_size):
+    """Stream is the same for any read size, pending buffer is reused between reads."""
+    rows = [
+        (str(uuid.uuid4()), str(uuid.uuid4()), str(uuid.uuid4()), role, None)
+        for role in ('actor', 'director', None) * ROLES_REPEAT
+    ]
+    encoders = get_encoders(PersonFilmwork)
+    expected = read_all(RowProducer(iter(rows), encoders), 1024 * 1024)
+
+    assert read_all(RowProducer(iter(rows), encoders), read_size) == expected
+    assert len(decode_copy(expected)) == len(rows)
+
+
+@pytest.mark.parametrize('fraction, microseconds', [
+    ('2', 200000),
+    ('22', 220000),
+    ('221', 221000),
+    ('2218', 221800),
+    ('22183', 221830),
+    ('221838', 221838),
+])
+def test_parse_datetime_fractions(fraction, microseconds):
+    """Fractions of 1 to 6 digits are parsed to microseconds, utc offset is kept in timezone."""
+    parsed = parse_datetime('2021-06-16 23:14:09.{0}-05'.format(fraction))
+
+    assert parsed.microsecond == microseconds
+    assert parsed.utcoffset() == timedelta(hours=-5)
+    assert parsed - FILMWORK_ROW[6] == timedelta(hours=8, microseconds=microseconds - FILMWORK_ROW[6].microsecond)
+
+
+@pytest.mark.parametrize('datetime_value', [
+    '2021-06-16 20:14:09+00',
+    '2021-06-16T20:14:09.221838+00',
+    '2021-06-16 20:14:09.2218381+00',
+    '2021-06-16 20:14:09.221838',
+    '2021-13-16 20:14:09.221838+00',
+    'not a datetime',
+    '',
+])
+def test_parse_datetime_bad_input(datetime_value):
+    """Other formats and values out of range raise ValueError."""
+    with pytest.raises(ValueError):
+        parse_datetime(datetime_value)
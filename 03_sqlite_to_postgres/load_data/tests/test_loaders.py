@@ -0,0 +1,62 @@
+"""Tests of validation of sqlite rows in sqlite loader."""
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+current = os.path.dirname(os.path.realpath(__file__))
+parent = os.path.dirname(current)
+sys.path.append(parent)
+import loaders
+from tables import Person, Table
+
+VALID_ID = '1a5ba1e4-0bd4-4dd5-bf9c-a2e5a6c9fa2c'
+BAD_DATETIME_ID = '2b3c0d1e-7a83-4f5e-9f19-9b1a7d0a4c55'
+BAD_UUID = 'not-a-uuid'
+CREATED_AT = '2021-06-16 20:14:09.221838+00'
+PERSON_ROWS = (
+    (VALID_ID, 'Mark Hamill', CREATED_AT, None),
+    (BAD_UUID, 'Harrison Ford', CREATED_AT, CREATED_AT),
+    (BAD_DATETIME_ID, 'Carrie Fisher', '2021-06-16T20:14:09+00', CREATED_AT),
+)
+
+
+def load_person_rows(log_path: str, monkeypatch) -> list[tuple]:
+    """Load rows of person table from in-memory sqlite database, skipped rows are logged to given file.
+
+    Args:
+        log_path: path of skipped rows log
+        monkeypatch: pytest monkeypatch
+
+    Returns:
+        list: validated rows
+
+    """
+    monkeypatch.setattr(loaders.log, 'baseFilename', log_path)
+    connection = sqlite3.connect(':memory:')
+    connection.execute('create table person (id text, full_name text, created_at text, updated_at text)')
+    connection.executemany('insert into person values (?, ?, ?, ?)', PERSON_ROWS)
+    tables = loaders.SQLiteLoader(connection).load_movies({'person': Table(Person, 10)})
+    rows = [row for _, _, table_rows in tables for row in table_rows]
+    connection.close()
+    loaders.log.close()
+    return rows
+
+
+def test_invalid_rows_are_skipped(tmp_path, monkeypatch):
+    """Rows with bad uuid or datetime are filtered out and logged."""
+    log_path = tmp_path / loaders.SKIPPED_ROWS_LOG
+    rows = load_person_rows(str(log_path), monkeypatch)
+
+    assert [row[0] for row in rows] == [VALID_ID]
+    logged = log_path.read_text(encoding='utf-8')
+    assert BAD_UUID in logged
+    assert BAD_DATETIME_ID in logged
+    assert VALID_ID not in logged
+
+
+def test_valid_row_datetimes_are_parsed(tmp_path, monkeypatch):
+    """Datetimes of valid rows are parsed once in loader, NULL datetimes stay None."""
+    rows = load_person_rows(str(tmp_path / loaders.SKIPPED_ROWS_LOG), monkeypatch)
+
+    assert rows == [(VALID_ID, 'Mark Hamill', datetime.fromisoformat('2021-06-16T20:14:09.221838+00:00'), None)]
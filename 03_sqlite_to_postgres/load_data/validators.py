@@ -0,0 +1,157 @@
+"""Validators of sqlite rows values against types of Postgres tables columns."""
+import re
+import uuid
+from dataclasses import fields
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache, partial
+from typing import Any, Callable, Type, Union, get_args, get_origin
+
+from tables import TableRow
+
+SQLITE_DATETIME = re.compile(r'(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2}):(\d{2})\.(\d{1,6})([+-]\d{2})', re.ASCII)
+MICROSECONDS_DIGITS = 6
+UUID_CANONICAL = re.compile('[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', re.ASCII | re.IGNORECASE)
+
+
+def check_value_error(func: Callable[[Any], Any], arg: Any) -> bool:
+    """Check if func call trigger ValueError. Used for types convertions.
+
+    Args:
+        func: function to test
+        arg: function argument for testing
+
+    Returns:
+        bool: True if ValueError rised
+
+    """
+    try:
+        func(arg)
+    except ValueError:
+        return True
+    return False
+
+
+@lru_cache(maxsize=None)
+def get_timezone(utc_offset: str) -> timezone:
+    """Get timezone by utc offset in hours.
+
+    Args:
+        utc_offset: offset in format '+HH'
+
+    Returns:
+        timezone: timezone with fixed offset
+
+    """
+    return timezone(timedelta(hours=int(utc_offset)))
+
+
+def parse_datetime(datetime_value: str) -> datetime:
+    """Parse datetime in sqlite text format 'YYYY-MM-DD HH:MM:SS.ffffff+HH' without strptime.
+
+    Args:
+        datetime_value: datetime in string format
+
+    Returns:
+        datetime: timezone aware datetime
+
+    Raises:
+        ValueError: if string has other format or values out of range
+
+    """
+    match = SQLITE_DATETIME.fullmatch(datetime_value)
+    if match is None:
+        raise ValueError('datetime {0} does not match format'.format(datetime_value))
+    *date_time_parts, fraction, utc_offset = match.groups()
+    return datetime(
+        *map(int, date_time_parts),
+        int(fraction.ljust(MICROSECONDS_DIGITS, '0')),
+        get_timezone(utc_offset),
+    )
+
+
+def convert_to_datetime(datetime_value: str) -> Union[datetime, str]:
+    """Convert datetime in string format to python datatime class or return value itself in case of ValueError.
+
+    Values which are not strings, e.g. NULLs, are returned as is without going through exception path.
+
+    Args:
+        datetime_value: datetime in string format
+
+    Returns:
+        ether a datetime object converted from string date or string itself in case of ValueError
+
+    """
+    if not isinstance(datetime_value, str):
+        return datetime_value
+    try:
+        converted = parse_datetime(datetime_value)
+    except ValueError:
+        return datetime_value
+    return converted
+
+
+def is_instance_of(possible_types: tuple[type, ...], row_value: Any) -> bool:
+    """Check value has one of possible types.
+
+    Args:
+        possible_types: types of Union field
+        row_value: value to check
+
+    Returns:
+        bool: True if value has one of possible types
+
+    """
+    return isinstance(row_value, possible_types)
+
+
+def is_convertable_to(target_type: Callable[[Any], Any], row_value: Any) -> bool:
+    """Check value can be converted to target type.
+
+    Args:
+        target_type: type of field
+        row_value: value to check
+
+    Returns:
+        bool: True if conversion does not raise ValueError
+
+    """
+    return not check_value_error(target_type, row_value)
+
+
+def is_uuid(row_value: Any) -> bool:
+    """Check value is uuid, strings in canonical form are matched by regex without building uuid object.
+
+    Args:
+        row_value: value to check
+
+    Returns:
+        bool: True if value is canonical uuid string or can be converted to uuid
+
+    """
+    if isinstance(row_value, str) and UUID_CANONICAL.fullmatch(row_value):
+        return True
+    return is_convertable_to(uuid.UUID, row_value)
+
+
+@lru_cache(maxsize=None)
+def get_validators(dc: Type[TableRow]) -> tuple[Callable[[Any], bool], ...]:
+    """Get validators of dataclass fields, built once per dataclass.
+
+    Datetime fields are expected to be converted with convert_to_datetime before validation.
+
+    Args:
+        dc: dataclass to get validators for
+
+    Returns:
+        tuple: validator per field in order of dataclass fields
+
+    """
+    validators = []
+    for field in fields(dc):
+        if get_origin(field.type) is Union:
+            validators.append(partial(is_instance_of, get_args(field.type)))
+        elif field.type is uuid.UUID:
+            validators.append(is_uuid)
+        else:
+            validators.append(partial(is_convertable_to, field.type))
+    return tuple(validators)